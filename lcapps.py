@@ -3,44 +3,88 @@ Helper functions for scraping Lane County, OR informational pages.
 """
 
 import argparse
+import asyncio
 import csv
 from functools import wraps
+import inspect
 import logging
 import os
 import re
 from time import sleep
 
+# Resource types the scrapers never read; see block_resources.
+# Stylesheets are not blocked, since locators' visibility checks use them.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+# Chromium features a scraper has no use for;
+# turning them off shrinks each browser (and so each context).
+CHROMIUM_ARGS = (
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--no-first-run",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+)
+
 
 def retry(times_to_retry=5):
     """
-    Decorate a function to retry.
+    Decorate a function (or coroutine function) to retry.
     Back off by number of retries cubed seconds each time,
     eg: 1, 8, 27, 64...
     """
 
+    def backoff(func, n_tries, args, kwargs) -> int:
+        """
+        Return seconds to sleep before the next try,
+        or 0 once times_to_retry is exhausted.
+        """
+        if n_tries > times_to_retry:
+            logging.error(
+                "%s failed after %d tries with args %s and kwargs %s",
+                func.__name__,
+                times_to_retry,
+                args,
+                kwargs,
+            )
+            return 0
+        logging.warning(
+            "%s: will sleep %d seconds before retry %d",
+            func.__name__,
+            sleep_duration := n_tries**3,
+            n_tries,
+        )
+        return sleep_duration
+
     def decorate(func):
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, n_tries=0, **kwargs):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    n_tries += 1
+                    sleep_duration = backoff(func, n_tries, args, kwargs)
+                    if not sleep_duration:
+                        raise
+                await asyncio.sleep(sleep_duration)
+                return await async_wrapper(*args, n_tries=n_tries, **kwargs)
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, n_tries=0, **kwargs):
             try:
                 return func(*args, **kwargs)
             except Exception:
-                if (n_tries := n_tries + 1) > times_to_retry:
-                    logging.error(
-                        "%s failed after %d tries with args %s and kwargs %s",
-                        func.__name__,
-                        times_to_retry,
-                        args,
-                        kwargs,
-                    )
+                n_tries += 1
+                sleep_duration = backoff(func, n_tries, args, kwargs)
+                if not sleep_duration:
                     raise
-                logging.warning(
-                    "%s: will sleep %d seconds before retry %d",
-                    func.__name__,
-                    sleep_duration := n_tries**3,
-                    n_tries,
-                )
-                sleep(sleep_duration)
-                return wrapper(*args, n_tries=n_tries, **kwargs)
+            sleep(sleep_duration)
+            return wrapper(*args, n_tries=n_tries, **kwargs)
 
         return wrapper
 
@@ -71,6 +115,18 @@ def strip(text: str) -> str:
     return re.sub(r"\s+", " ", text.strip())
 
 
+def unique(iterable) -> iter:
+    """
+    Accept iterable.
+    Yield its items in order, skipping any already yielded.
+    """
+    seen = set()
+    for item in iterable:
+        if item not in seen:
+            seen.add(item)
+            yield item
+
+
 def write_csv(output, rows: iter, dest=""):
     """
     Accept output, rows (iter of dicts).
@@ -92,6 +148,17 @@ def write_csv(output, rows: iter, dest=""):
         writer.writerows(rows)
 
 
+def positive_int(text: str) -> int:
+    """
+    Accept text (a command line argument).
+    Return it as an int, raising argparse.ArgumentTypeError unless >= 1.
+    """
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{text} is not a positive integer")
+    return value
+
+
 def get_parser(*args, **kwargs) -> argparse.ArgumentParser:
     """
     Accept args (a list of arguments to insert before universal args),
@@ -136,9 +203,46 @@ def get_parser(*args, **kwargs) -> argparse.ArgumentParser:
             """,
         action="store_true",
     )
+    parser.add_argument(
+        "-C",
+        "--cdp-endpoint",
+        help="""
+            Connect to an already running Chromium at this CDP endpoint
+            (eg http://localhost:9222) instead of launching one.
+            """,
+        default=None,
+    )
     return parser
 
 
+def get_browser(playwright, headless=True, cdp_endpoint=None):
+    """
+    Accept playwright, optional headless (default True),
+    optional cdp_endpoint.
+    Connect to the Chromium at cdp_endpoint if given,
+    otherwise launch one with CHROMIUM_ARGS.
+    Return the browser (or, under the async API, an awaitable of it).
+    """
+    if cdp_endpoint:
+        logging.info("connecting to %s", cdp_endpoint)
+        return playwright.chromium.connect_over_cdp(cdp_endpoint)
+    return playwright.chromium.launch(
+        headless=headless, args=list(CHROMIUM_ARGS)
+    )
+
+
+def block_resources(route):
+    """
+    Accept route (for use as a handler with context.route("**/*", ...)).
+    Abort it if its resource type is in BLOCKED_RESOURCE_TYPES,
+    otherwise continue it.
+    Return the result (under the async API, an awaitable).
+    """
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        return route.abort()
+    return route.continue_()
+
+
 def log_name(script):
     """
     Accept script (path).
@@ -4,29 +4,117 @@ Scrape account information from
 https://apps.lanecounty.org/PropertyAccountInformation/
 """
 
+import asyncio
 from decimal import Decimal
-from itertools import dropwhile
+from functools import lru_cache
+from itertools import chain
 import re
 
-from playwright.sync_api import (
-    Playwright,
-    expect,
-    sync_playwright,
+from playwright.async_api import (
+    BrowserContext,
+    async_playwright,
     TimeoutError as PlaywrightTimeoutError,
 )
 
 from lcapps import (
     argparse,
+    block_resources,
     configure_logging,
+    get_browser,
     get_parser,
     logging,
     log_name,
+    positive_int,
     retry,
     strip,
+    unique,
     write_csv,
 )
 
+RESIDENTIAL_NONE_RE = re.compile(r"Residential Building\s*None")
+COMMERCIAL_NONE_RE = re.compile(r"Commercial Building\s*None")
+# Characters clean_money deletes in a single translate pass.
+MONEY_JUNK = str.maketrans("", "", "$, ")
+# Labels of the Account Information rows get_account_lot_payer_owner reads.
+ACCOUNT_LABELS = (
+    "Related to Account(s)",
+    "Located on Account",
+    "Tax Payer",
+    "Situs Address",
+    "Mailing Address",
+    "Map and Tax Lot #",
+    "Acreage",
+    "TCA",
+    "Prop Class",
+)
+
+# Read the Account Information, receipts and assessments tables
+# in one round-trip rather than one per cell.
+ACCOUNT_PAGE_JS = """
+() => {
+    const text = (el) => el.textContent;
+    const cells = (tr) => Array.from(tr.querySelectorAll("td"), text);
+    const containing = (selector, label) =>
+        Array.from(document.querySelectorAll(selector)).filter((el) =>
+            el.textContent.includes(label)
+        );
+
+    const accountDiv = containing("div", "Account Information")
+        .filter((div) => div.querySelector("tbody"))
+        .pop();
+    // label -> last cell text; the label is whatever precedes the value.
+    const account = accountDiv
+        ? Object.fromEntries(
+              Array.from(accountDiv.querySelectorAll("tbody tr"), (tr) => {
+                  const value = cells(tr).pop() ?? "";
+                  return [tr.textContent.replace(value, ""), value];
+              })
+          )
+        : {};
+
+    const receiptsTable = containing("table", "Amount Received").pop();
+    const receipts = receiptsTable
+        ? {
+              empty: receiptsTable.textContent.includes(
+                  "No records to display"
+              ),
+              rows: Array.from(
+                  receiptsTable.querySelectorAll("tbody tr"),
+                  cells
+              ),
+          }
+        : null;
+
+    const assessedTable = containing("table", "Assessed Value")[0];
+    const assessments = assessedTable
+        ? {
+              headers: Array.from(
+                  assessedTable.querySelectorAll(":scope table thead tr th"),
+                  text
+              ),
+              rows: Array.from(
+                  assessedTable.querySelectorAll(":scope table tbody tr"),
+                  cells
+              ),
+          }
+        : null;
+
+    return { account, receipts, assessments };
+}
+"""
+
+# Owner, address and city/state/zip of each owner row, skipping the header.
+OWNER_ROWS_JS = """
+(trs) => trs
+    .slice(1)
+    .map((tr) =>
+        Array.from(tr.querySelectorAll("td"), (td) => td.textContent.trim())
+            .slice(0, 3)
+    )
+"""
+
 
+@lru_cache(maxsize=1024)
 def clean_address_2(address: str) -> tuple:
     """
     Accept 2 line situs address.
@@ -35,18 +123,21 @@ def clean_address_2(address: str) -> tuple:
     return tuple(elem.strip() for elem in address.split("\n") if elem.strip())
 
 
+@lru_cache(maxsize=1024)
 def clean_address_4(address: str) -> tuple:
     """
     Accept 4 line mailing address.
     Return as a tuple of lines, with extra whitespace removed.
     Discard empty lines at beginning and end.
     """
-
-    def dropunless_and_reverse(iterable) -> list:
-        return list(reversed(list(dropwhile(lambda x: not x, iterable))))
-
     lines = [elem.strip() for elem in address.split("\n")]
-    return dropunless_and_reverse(dropunless_and_reverse(lines))
+    start, end = 0, len(lines)
+    while start < end and not lines[start]:
+        start += 1
+    while end > start and not lines[end - 1]:
+        end -= 1
+    # A tuple, since cached results are shared between callers.
+    return tuple(lines[start:end])
 
 
 def clean_more(entry: str) -> str:
@@ -57,6 +148,7 @@ def clean_more(entry: str) -> str:
     return strip(entry).removesuffix("More...").strip()
 
 
+@lru_cache(maxsize=4096)
 def clean_money(dollars: str) -> Decimal:
     """
     Accept dollars (str).
@@ -65,141 +157,130 @@ def clean_money(dollars: str) -> Decimal:
     prestripped = dollars.strip()
     # negative amounts are represented with parentheses around them:
     # -$12.01 is ($12.01)
-    m = re.match(r"\((\$[0-9.]+)\)", prestripped)
-    if m:
-        prestripped = m.groups()[0]
+    if prestripped.startswith("(") and prestripped.endswith(")"):
+        prestripped = prestripped[1:-1]
         sign = -1
     else:
         sign = 1
 
-    cleaned = prestripped.strip().lstrip("$").replace(",", "")
+    cleaned = prestripped.translate(MONEY_JUNK)
     return Decimal(cleaned).quantize(Decimal("1.00")) * sign
 
 
-def get_account_row(rows, label: str, cleaner=strip):
+def get_account_field(fields: dict, label: str, account) -> str:
     """
-    Accept rows, label, optional cleaner (default strip).
-    Return cleaned text from the last element of row starting with label.
+    Accept fields (normalized row label to value), label, account.
+    Return the value of the row labeled label, else of the last row
+    whose label contains it, else "" (with a warning).
     """
-    try:
-        return cleaner(
-            rows.filter(has_text=label).locator("td").last.text_content()
-        )
-    except PlaywrightTimeoutError:
-        return ""
+    if label in fields:
+        return fields[label]
+    # Labels with extra text (eg an icon's) still match, as has_text did.
+    matches = [value for key, value in fields.items() if label in key]
+    if matches:
+        return matches[-1]
+    logging.warning("%s: no %s in account information", account, label)
+    return ""
 
 
-def get_account_lot_payer_owner(page, account) -> dict:
+def get_account_lot_payer_owner(raw: dict, account) -> dict:
     """
-    Accept page, account.
-    page is https://apps.lanecounty.org/PropertyAccountInformation/#
-    with "search by Account number" and a single account line.
-    Return a dict of account information from that page.
+    Accept raw (the "account" map of row label to value
+    from get_account_page), account.
+    Return a dict of account information picked from it by label.
     """
     logging.debug("%s: getting account info", account)
-    account_div = page.locator("div").filter(
-        has=page.get_by_text("Account Information")
-    )
-    rows = account_div.locator("tbody").locator("tr")
-    site_address, site_city_state_zip = get_account_row(
-        rows, "Situs Address", cleaner=clean_address_2
+    # Normalize each label once, so fields can be picked by exact label.
+    fields = {
+        strip(label).removesuffix(":").strip(): value
+        for label, value in raw.items()
+    }
+    values = {
+        label: get_account_field(fields, label, account)
+        for label in ACCOUNT_LABELS
+    }
+    site_address, site_city_state_zip = clean_address_2(
+        values["Situs Address"]
     )
-    m_address_1, m_address_2, m_address_3, m_city_state_zip = get_account_row(
-        rows, "Mailing Address", cleaner=clean_address_4
+    m_address_1, m_address_2, m_address_3, m_city_state_zip = (
+        clean_address_4(values["Mailing Address"])
     )
     logging.debug("%s: got account info", account)
     return {
         "account_number": account,
-        "related_to_accounts": get_account_row(
-            rows, "Related to Account(s)", cleaner=clean_more
-        ),
-        "located_on_account": get_account_row(
-            rows, "Located on Account", cleaner=clean_more
-        ),
-        "tax_payer": get_account_row(rows, "Tax Payer"),
+        "related_to_accounts": clean_more(values["Related to Account(s)"]),
+        "located_on_account": clean_more(values["Located on Account"]),
+        "tax_payer": strip(values["Tax Payer"]),
         "situs_address": site_address,
         "situs_city_state_zip": site_city_state_zip,
         "mailing_address_1": m_address_1,
         "mailing_address_2": m_address_2,
         "mailing_address_3": m_address_3,
         "mailing_city_state_zip": m_city_state_zip,
-        "map_and_tax_lot_number": get_account_row(rows, "Map and Tax Lot #"),
-        "acreage": get_account_row(rows, "Acreage"),
-        "tca": get_account_row(rows, "TCA"),
-        "prop_class": get_account_row(rows, "Prop Class"),
+        "map_and_tax_lot_number": strip(values["Map and Tax Lot #"]),
+        "acreage": strip(values["Acreage"]),
+        "tca": strip(values["TCA"]),
+        "prop_class": strip(values["Prop Class"]),
     }
 
 
-def get_receipt_entry(row, idx: int, cleaner=strip):
+def get_receipt_entry(cells: list, idx: int, cleaner=strip):
     """
-    Accept row, idx (int), optional cleaner (default strip).
-    Return cleaned text from the index idx of row.
+    Accept cells (list of str), idx (int), optional cleaner (default strip).
+    Return cleaned text from the index idx of cells.
     """
-    return cleaner(row.locator("td").nth(idx).text_content())
+    return cleaner(cells[idx])
 
 
-def get_receipts(page, account) -> list:
+def get_receipts(table, account) -> list:
     """
-    Accept page, account.
-    page is, eg https://apps.lanecounty.org/PropertyAccountInformation/Account/0259901.
-    Return list of dicts of receipt information from page.
+    Accept table (the "receipts" entry from get_account_page), account.
+    Return list of dicts of receipt information from table.
     """
     logging.debug("%s: getting receipts", account)
-    receipts_table = page.locator("table").filter(
-        has=page.get_by_text("Amount Received")
-    )
-    if "No records to display" in receipts_table.text_content():
+    if table is None or not table["rows"] or table["empty"]:
         logging.info("%s: No records to display", account)
         return []
     try:
-        rows = receipts_table.locator("tbody").locator("tr").all()
         receipts = [
             {
                 "account_number": account,
-                "date": get_receipt_entry(row, 0),
+                "date": get_receipt_entry(cells, 0),
                 "amount_received": get_receipt_entry(
-                    row, 1, cleaner=clean_money
+                    cells, 1, cleaner=clean_money
                 ),
-                "tax": get_receipt_entry(row, 2, cleaner=clean_money),
-                "discount": get_receipt_entry(row, 3, cleaner=clean_money),
-                "interest": get_receipt_entry(row, 4, cleaner=clean_money),
+                "tax": get_receipt_entry(cells, 2, cleaner=clean_money),
+                "discount": get_receipt_entry(cells, 3, cleaner=clean_money),
+                "interest": get_receipt_entry(cells, 4, cleaner=clean_money),
             }
-            for row in rows
+            for cells in table["rows"]
         ]
-    except PlaywrightTimeoutError as error:
+    except IndexError as error:
         logging.error("%s: unable to find receipts", account)
         raise ValueError("Unable to find receipts") from error
     logging.debug("%s: got receipts", account)
     return receipts
 
 
-def get_assesments_row(rows, idx: int) -> list:
+def get_assesments_row(rows: list, idx: int) -> list:
     """
-    Accept rows, idx (int).
+    Accept rows (list of lists of str), idx (int).
     Return assesment values for row at index idx.
     """
-    return [
-        clean_money(td.text_content()) for td in rows[idx].locator("td").all()
-    ]
+    return [clean_money(text) for text in rows[idx]]
 
 
-def get_assessments(page, account) -> list:
+def get_assessments(table, account) -> list:
     """
-    Accept page, account.
-    page is, eg https://apps.lanecounty.org/PropertyAccountInformation/Account/0259901.
-    Return list of dicts of assessment information from page.
+    Accept table (the "assessments" entry from get_account_page), account.
+    Return list of dicts of assessment information from table.
     """
     logging.debug("%s: getting assessments", account)
-    assessments_table = (
-        page.locator("table")
-        .filter(has=page.get_by_text("Assessed Value"))
-        .locator("table")
-    )
-    headers = (
-        assessments_table.locator("thead").locator("tr").locator("th").all()
-    )
-    years = [int(th.text_content()) for th in headers]
-    rows = assessments_table.locator("tbody").locator("tr").all()
+    if table is None:
+        logging.warning("%s: no assessments", account)
+        return []
+    years = [int(text) for text in table["headers"]]
+    rows = table["rows"]
 
     try:
         assessed_values = get_assesments_row(rows, 0)
@@ -222,64 +303,68 @@ def get_assessments(page, account) -> list:
     ]
 
 
-def get_owner_item(row, idx: int) -> str:
+async def get_account_page(page, account) -> dict:
     """
-    Accept owner row, idx.
-    Return stripped item at index idx.
+    Accept page, account.
+    page is, eg https://apps.lanecounty.org/PropertyAccountInformation/Account/0259901.
+    Return the account, receipts and assessments tables,
+    read in a single page.evaluate (see ACCOUNT_PAGE_JS).
     """
-    return row.locator("td").nth(idx).text_content().strip()
+    logging.debug("%s: reading account page", account)
+    # evaluate does not auto-wait like locators do.
+    # Not every account has assessments, so do not wait for them;
+    # ACCOUNT_PAGE_JS returns null for a missing assessments table.
+    for label in ["Account Information", "Amount Received"]:
+        await page.get_by_text(label).first.wait_for()
+    return await page.evaluate(ACCOUNT_PAGE_JS)
 
 
-def get_building_floor(tbody, floor) -> dict:
+async def get_building_floor(tbody, floor) -> dict:
     """
     Accept tbody (residential floors table body), floor.
     Return dict.
     """
     cells = (
-        tbody.get_by_role("row").filter(has_text=floor).get_by_role("cell")
+        await tbody.get_by_role("row")
+        .filter(has_text=floor)
+        .get_by_role("cell")
+        .all_text_contents()
     )
     return {
-        "base_sq_ft": cells.nth(1).text_content().strip(),
-        "finished_sq_ft": cells.nth(2).text_content().strip(),
+        "base_sq_ft": cells[1].strip(),
+        "finished_sq_ft": cells[2].strip(),
     }
 
 
-def get_structure(tbody, structure) -> str:
+async def get_structure(tbody, structure) -> str:
     """
     Accept tbody (residential structures table body), structure.
     Return str of structure's square footage.
     """
     cell = tbody.locator("tr").filter(has_text=structure).locator("td")
-    return cell.text_content().strip()
-
-
-def get_manufactured_home_item(cells, idx: int) -> str:
-    """
-    Accept cells (row tds), index idx.
-    Return stripped text from that cell.
-    """
-    return cells.nth(idx).text_content().strip()
+    return (await cell.text_content()).strip()
 
 
-def get_residential_text(page) -> str:
+async def get_residential_text(page) -> str:
     """
     Accept page.
     page is, e.g.,
     https://www.rlid.org/custom/lc/at/index.cfm?do=custom_LC_AT_propsearch.directqry&type=report&acctint=0259901
     Return the string of the "Residential Building" line.
     """
-    return page.get_by_text("Residential Building").text_content().strip()
+    return (
+        await page.get_by_text("Residential Building").text_content()
+    ).strip()
 
 
-def get_residential_building(page, taxlot) -> dict:
+async def get_residential_building(page, taxlot, res_text: str) -> dict:
     """
-    Accept page.
+    Accept page, taxlot, res_text (the "Residential Building" line).
     page is, e.g.,
     https://www.rlid.org/custom/lc/at/index.cfm?do=custom_LC_AT_propsearch.directqry&type=report&acctint=0259901
     Return a dict about any residential building described on the page.
     """
-    res_text = get_residential_text(page)
-    if re.search(r"Residential Building\s*None", res_text):
+    if RESIDENTIAL_NONE_RE.search(res_text):
         logging.debug("%s: No residential buildings", taxlot)
         return {}
     # We do not have a way of getting information on additional buildings
@@ -293,92 +378,101 @@ def get_residential_building(page, taxlot) -> dict:
 
     logging.debug("%s: looking for residential structure", taxlot)
     year_tr = res_supertable.locator("tr", has_text="Year Built").first
-    try:
-        expect(year_tr).to_be_visible()
-        year_built = year_tr.locator("td").text_content().strip()
-        building_tbody = res_supertable.locator("tbody").filter(
-            has_text="Floor"
-        )
-        structures_tbody = res_supertable.locator("tbody").filter(
-            has_text="Structure"
-        )
-
-        basement_floor = get_building_floor(building_tbody, "Basement")
-        first_floor = get_building_floor(building_tbody, "First")
-        second_floor = get_building_floor(building_tbody, "Second")
-        attic_floor = get_building_floor(building_tbody, "Attic")
-        total_floor = get_building_floor(building_tbody, "Total")
-        return {
-            "taxlot": taxlot,
-            "year_built": year_built,
-            "basement_floor_base": basement_floor["base_sq_ft"],
-            "basement_floor_finished": basement_floor["finished_sq_ft"],
-            "first_floor_base": first_floor["base_sq_ft"],
-            "first_floor_finished": first_floor["finished_sq_ft"],
-            "second_floor_base": second_floor["base_sq_ft"],
-            "second_floor_finished": second_floor["finished_sq_ft"],
-            "attic_floor_base": attic_floor["base_sq_ft"],
-            "attic_floor_finished": attic_floor["finished_sq_ft"],
-            "total_floor_base": total_floor["base_sq_ft"],
-            "total_floor_finished": total_floor["finished_sq_ft"],
-            "basement_garage": get_structure(structures_tbody, "Bsmt Garage"),
-            "attached_garage": get_structure(structures_tbody, "Att Garage"),
-            "detached_garage": get_structure(structures_tbody, "Det Garage"),
-            "attached_carport": get_structure(
-                structures_tbody, "Att Carport"
-            ),
-            "manufactured": "false",
-            "manufactured_model_year": "N/A",
-            "manufactured_make": "N/A",
-            "manufactured_plate": "N/A",
-            "manufactured_lois": "N/A",
-        }
-    except (AssertionError, PlaywrightTimeoutError) as error:
-        logging.warning("%s: residential not found: %s", taxlot, error)
-        logging.debug("%s: looking for manufactured structure", taxlot)
+    # count() does not wait, unlike expect(...).to_be_visible().
+    if await year_tr.count():
         try:
-            manufactured_structure = page.get_by_text(
-                "Manufactured Structure"
+            year_built = (await year_tr.locator("td").text_content()).strip()
+            res_tbodies = res_supertable.locator("tbody")
+            building_tbody = res_tbodies.filter(has_text="Floor")
+            structures_tbody = res_tbodies.filter(has_text="Structure")
+
+            basement_floor = await get_building_floor(
+                building_tbody, "Basement"
             )
-            expect(manufactured_structure).to_be_visible()
-            # We can scrape 1 manufactured home, whether it has data or not.
-            # We have not yet seen multiple manufactured homes, so warn on them.
-            logging.warning("%s: manufactured building", taxlot)
-            tbody = page.locator(
-                "tbody:below(:text('Manufactured Structure'))"
-            ).first
-            cells = tbody.locator("tr").last.locator("td")
+            first_floor = await get_building_floor(building_tbody, "First")
+            second_floor = await get_building_floor(building_tbody, "Second")
+            attic_floor = await get_building_floor(building_tbody, "Attic")
+            total_floor = await get_building_floor(building_tbody, "Total")
             return {
                 "taxlot": taxlot,
-                "year_built": "N/A",
-                "basement_floor_base": "N/A",
-                "basement_floor_finished": "N/A",
-                "first_floor_base": "N/A",
-                "first_floor_finished": "N/A",
-                "second_floor_base": "N/A",
-                "second_floor_finished": "N/A",
-                "attic_floor_base": "N/A",
-                "attic_floor_finished": "N/A",
-                "total_floor_base": "N/A",
-                "total_floor_finished": "N/A",
-                "basement_garage": "N/A",
-                "attached_garage": "N/A",
-                "detached_garage": "N/A",
-                "attached_carport": "N/A",
-                "manufactured": "true",
-                "manufactured_model_year": get_manufactured_home_item(
-                    cells, 0
+                "year_built": year_built,
+                "basement_floor_base": basement_floor["base_sq_ft"],
+                "basement_floor_finished": basement_floor[
+                    "finished_sq_ft"
+                ],
+                "first_floor_base": first_floor["base_sq_ft"],
+                "first_floor_finished": first_floor["finished_sq_ft"],
+                "second_floor_base": second_floor["base_sq_ft"],
+                "second_floor_finished": second_floor["finished_sq_ft"],
+                "attic_floor_base": attic_floor["base_sq_ft"],
+                "attic_floor_finished": attic_floor["finished_sq_ft"],
+                "total_floor_base": total_floor["base_sq_ft"],
+                "total_floor_finished": total_floor["finished_sq_ft"],
+                "basement_garage": await get_structure(
+                    structures_tbody, "Bsmt Garage"
+                ),
+                "attached_garage": await get_structure(
+                    structures_tbody, "Att Garage"
                 ),
-                "manufactured_make": get_manufactured_home_item(cells, 1),
-                "manufactured_plate": get_manufactured_home_item(cells, 2),
-                "manufactured_lois": get_manufactured_home_item(cells, 3),
+                "detached_garage": await get_structure(
+                    structures_tbody, "Det Garage"
+                ),
+                "attached_carport": await get_structure(
+                    structures_tbody, "Att Carport"
+                ),
+                "manufactured": "false",
+                "manufactured_model_year": "N/A",
+                "manufactured_make": "N/A",
+                "manufactured_plate": "N/A",
+                "manufactured_lois": "N/A",
             }
-        except AssertionError:
-            logging.error("%s: unknown residential building", taxlot)
-            return {}
+        # all_text_contents() does not wait, so a missing floor row
+        # shows up as an IndexError rather than a timeout.
+        except (PlaywrightTimeoutError, IndexError) as error:
+            logging.warning("%s: residential not found: %s", taxlot, error)
+    else:
+        logging.warning("%s: residential not found", taxlot)
+
+    logging.debug("%s: looking for manufactured structure", taxlot)
+    if not await page.get_by_text("Manufactured Structure").count():
+        logging.error("%s: unknown residential building", taxlot)
+        return {}
+    # We can scrape 1 manufactured home, whether it has data or not.
+    # We have not yet seen multiple manufactured homes, so warn on them.
+    logging.warning("%s: manufactured building", taxlot)
+    tbody = page.locator("tbody:below(:text('Manufactured Structure'))").first
+    cells = [
+        cell.strip()
+        for cell in await tbody.locator("tr")
+        .last.locator("td")
+        .all_text_contents()
+    ]
+    return {
+        "taxlot": taxlot,
+        "year_built": "N/A",
+        "basement_floor_base": "N/A",
+        "basement_floor_finished": "N/A",
+        "first_floor_base": "N/A",
+        "first_floor_finished": "N/A",
+        "second_floor_base": "N/A",
+        "second_floor_finished": "N/A",
+        "attic_floor_base": "N/A",
+        "attic_floor_finished": "N/A",
+        "total_floor_base": "N/A",
+        "total_floor_finished": "N/A",
+        "basement_garage": "N/A",
+        "attached_garage": "N/A",
+        "detached_garage": "N/A",
+        "attached_carport": "N/A",
+        "manufactured": "true",
+        "manufactured_model_year": cells[0],
+        "manufactured_make": cells[1],
+        "manufactured_plate": cells[2],
+        "manufactured_lois": cells[3],
+    }
 
 
-def get_building_stat(rows, label: str, has_not_text=None) -> str:
+async def get_building_stat(rows, label: str, has_not_text=None) -> str:
     """
     Accept Commercial Building table rows, label, optional has_not_text.
     Select row that matches label but not has_not_text.
@@ -390,66 +484,72 @@ def get_building_stat(rows, label: str, has_not_text=None) -> str:
         )
     else:
         matches = rows.filter(has_text=label)
-    return matches.get_by_role("cell").last.text_content().strip()
+    return (await matches.get_by_role("cell").last.text_content()).strip()
 
 
-def get_commercial_building(description, table, taxlot) -> dict:
+async def get_commercial_building(description, table, taxlot) -> dict:
     """
     Accept description, table, taxlot.
     Return dict of information about the building.
     """
-    stats, sq_ft = table.get_by_role("table").all()
+    stats, sq_ft = await table.get_by_role("table").all()
     stats_rows = stats.get_by_role("row")
     sq_ft_rows = sq_ft.get_by_role("row")
     return {
         "taxlot": taxlot,
         "description": description,
-        "year_built": get_building_stat(
+        "year_built": await get_building_stat(
             stats_rows, "Year Built", has_not_text="Effective"
         ),
-        "effective_year_built": get_building_stat(
+        "effective_year_built": await get_building_stat(
             stats_rows, "Effective Year Built"
         ),
-        "grade": get_building_stat(stats_rows, "Grade"),
-        "floor_number": get_building_stat(stats_rows, "Floor Number"),
-        "wall_height_ft": get_building_stat(stats_rows, "Wall Height Ft"),
-        "occupancy_number": get_building_stat(stats_rows, "Occupancy Number"),
-        "sq_ft": sq_ft_rows.first.get_by_role("cell")
-        .last.text_content()
-        .strip(),
-        "fireproof_steel_sq_ft": get_building_stat(
+        "grade": await get_building_stat(stats_rows, "Grade"),
+        "floor_number": await get_building_stat(stats_rows, "Floor Number"),
+        "wall_height_ft": await get_building_stat(
+            stats_rows, "Wall Height Ft"
+        ),
+        "occupancy_number": await get_building_stat(
+            stats_rows, "Occupancy Number"
+        ),
+        "sq_ft": (
+            await sq_ft_rows.first.get_by_role("cell").last.text_content()
+        ).strip(),
+        "fireproof_steel_sq_ft": await get_building_stat(
             sq_ft_rows, "Fireproof Steel Sq Ft"
         ),
-        "reinforced_concrete_sq_ft": get_building_stat(
+        "reinforced_concrete_sq_ft": await get_building_stat(
             sq_ft_rows, "Reinforced Concrete Sq Ft"
         ),
-        "fire_resistant_sq_ft": get_building_stat(
+        "fire_resistant_sq_ft": await get_building_stat(
             sq_ft_rows, "Fire Resistant Sq Ft"
         ),
-        "wood_joist_sq_ft": get_building_stat(sq_ft_rows, "Wood Joist Sq Ft"),
-        "pole_frame_sq_ft": get_building_stat(sq_ft_rows, "Pole Frame Sq Ft"),
-        "pre_engineered_steel_sq_ft": get_building_stat(
+        "wood_joist_sq_ft": await get_building_stat(
+            sq_ft_rows, "Wood Joist Sq Ft"
+        ),
+        "pole_frame_sq_ft": await get_building_stat(
+            sq_ft_rows, "Pole Frame Sq Ft"
+        ),
+        "pre_engineered_steel_sq_ft": await get_building_stat(
             sq_ft_rows, "Pre-engineered Steel Sq Ft"
         ),
     }
 
 
-def get_commercial_improvements(page, taxlot) -> list:
+async def get_commercial_improvements(page, taxlot, res_text: str) -> list:
     """
-    Accept page.
+    Accept page, taxlot, res_text (the "Residential Building" line).
     page is, e.g.,
     https://www.rlid.org/custom/lc/at/index.cfm?do=custom_LC_AT_propsearch.directqry&type=report&acctint=0259901
     Return a list of commercial improvements.
     """
-    res_text = get_residential_text(page)
-
     logging.debug("%s: looking for commercial improvements", taxlot)
     commercial_elems = [
         {
-            "text": header.text_content().strip(),
+            "text": (await header.text_content()).strip(),
             "header": header,
         }
-        for header in page.locator(
+        for header in await page.locator(
             f"h3:below(:text('{res_text}'))", has_text="Commercial"
         ).all()
     ]
@@ -459,7 +559,7 @@ def get_commercial_improvements(page, taxlot) -> list:
         if elem["text"] == "Commercial Improvements":
             commercial_header = elem["header"]
             break
-        if re.match(r"Commercial Building\s*None", elem["text"]):
+        if COMMERCIAL_NONE_RE.match(elem["text"]):
             logging.debug("%s: No commercial buildings", taxlot)
             return []
 
@@ -474,22 +574,26 @@ def get_commercial_improvements(page, taxlot) -> list:
 
     building_elems = [
         {
-            "label": header.text_content().strip(),
+            "label": (await header.text_content()).strip(),
             "table": header.locator("xpath=following::table[1]"),
         }
-        for header in commercial_header.locator("xpath=following::h4").all()
+        for header in await commercial_header.locator(
+            "xpath=following::h4"
+        ).all()
     ]
     logging.debug(
         "%s: Finding %d commercial buildings", taxlot, len(building_elems)
     )
 
     return [
-        get_commercial_building(building["label"], building["table"], taxlot)
+        await get_commercial_building(
+            building["label"], building["table"], taxlot
+        )
         for building in building_elems
     ]
 
 
-def get_taxlot_page(page, account: str) -> dict:
+async def get_taxlot_page(page, account: str) -> dict:
     """
     Accept page, account.
     page is, e.g.,
@@ -497,10 +601,10 @@ def get_taxlot_page(page, account: str) -> dict:
     Return a dict of owners information from that page.
     """
     logging.debug("%s: getting owner info", account)
-    page.get_by_role("button", name="View Owners").click()
-    page.wait_for_url("https://www.rlid.org/custom/lc/at/index.cfm**")
-    page.wait_for_load_state()
-    title = page.title()
+    await page.get_by_role("button", name="View Owners").click()
+    await page.wait_for_url("https://www.rlid.org/custom/lc/at/index.cfm**")
+    await page.wait_for_load_state()
+    title = await page.title()
 
     if (
         title
@@ -519,8 +623,7 @@ def get_taxlot_page(page, account: str) -> dict:
 
     map_tax_s = "Map, Tax Lot & SIC "
     taxlot = (
-        page.get_by_text(map_tax_s)
-        .last.text_content()
+        (await page.get_by_text(map_tax_s).last.text_content())
         .removeprefix(map_tax_s)
         .strip()
         .replace("-", "")
@@ -530,10 +633,12 @@ def get_taxlot_page(page, account: str) -> dict:
     additional_s = "Additional Account Numbers for this Tax Lot"
     additional_accounts = [
         account.strip()
-        for account in page.get_by_role("row")
-        .filter(has_text=additional_s)
-        .get_by_role("cell")
-        .last.text_content()
+        for account in (
+            await page.get_by_role("row")
+            .filter(has_text=additional_s)
+            .get_by_role("cell")
+            .last.text_content()
+        )
         .strip()
         .removeprefix(additional_s)
         .split(";")
@@ -548,14 +653,13 @@ def get_taxlot_page(page, account: str) -> dict:
     )
 
     account_type = (
-        page.locator("tbody")
+        await page.locator("tbody")
         .locator("tbody")
         .locator("tr")
         .filter(has_text="Account Type")
         .locator("td")
         .last.text_content()
-        .strip()
-    )
+    ).strip()
 
     taxlot_accounts = [
         {
@@ -568,14 +672,21 @@ def get_taxlot_page(page, account: str) -> dict:
         {
             "account": account,
             "account_type": account_type,
-            "owner": get_owner_item(row, 0),
-            "address": get_owner_item(row, 1),
-            "city_state_zip": get_owner_item(row, 2),
+            "owner": owner,
+            "address": address,
+            "city_state_zip": city_state_zip,
         }
-        for row in owner_table.locator("tr").all()[1:]
+        for owner, address, city_state_zip in await owner_table.locator(
+            "tr"
+        ).evaluate_all(OWNER_ROWS_JS)
     ]
-    residential_building = get_residential_building(page, taxlot)
-    commercial_improvements = get_commercial_improvements(page, taxlot)
+    res_text = await get_residential_text(page)
+    residential_building = await get_residential_building(
+        page, taxlot, res_text
+    )
+    commercial_improvements = await get_commercial_improvements(
+        page, taxlot, res_text
+    )
     logging.debug("%s: got owner info", account)
     return {
         "owners": owners,
@@ -586,30 +697,41 @@ def get_taxlot_page(page, account: str) -> dict:
 
 
 @retry()
-def run(playwright: Playwright, account: str, headless=True) -> dict:
+async def run(context: BrowserContext, account: str) -> dict:
     """
-    Run playwright against account.
+    Run playwright against account, in a new page of context.
     Return a dict of lists of dicts: accounts, receipts, assessments.
     """
     logging.info("%s: scraping", account)
-    browser = playwright.chromium.launch(headless=headless)
-    context = browser.new_context()
-    # context.set_default_timeout(100_000)
-    page = context.new_page()
-    page.goto("https://apps.lanecounty.org/PropertyAccountInformation/")
-    page.get_by_placeholder("Enter partial account #").fill(account)
-    page.get_by_role("button", name="Save Search").click()
+    page = await context.new_page()
+    try:
+        return await scrape_account(page, account)
+    finally:
+        await page.close()
+
+
+async def scrape_account(page, account: str) -> dict:
+    """
+    Accept page (a blank page), account.
+    Return a dict of lists of dicts: accounts, receipts, assessments.
+    """
+    await page.goto("https://apps.lanecounty.org/PropertyAccountInformation/")
+    await page.get_by_placeholder("Enter partial account #").fill(account)
+    await page.get_by_role("button", name="Save Search").click()
     try:
-        page.get_by_role("link", name=account).first.click()
+        await page.get_by_role("link", name=account).first.click()
     except PlaywrightTimeoutError:
         logging.error("%s: get account link timed out", account)
         raise
 
-    account_lot_payer_owner = get_account_lot_payer_owner(page, account)
-    receipts = get_receipts(page, account)
-    assessments = get_assessments(page, account)
+    account_page = await get_account_page(page, account)
+    account_lot_payer_owner = get_account_lot_payer_owner(
+        account_page["account"], account
+    )
+    receipts = get_receipts(account_page["receipts"], account)
+    assessments = get_assessments(account_page["assessments"], account)
 
-    taxlot = get_taxlot_page(page, account)
+    taxlot = await get_taxlot_page(page, account)
     logging.info("%s: scraped", account)
     return {
         "account_lot_payer_owner": [account_lot_payer_owner],
@@ -622,14 +744,95 @@ def run(playwright: Playwright, account: str, headless=True) -> dict:
     }
 
 
-def load_file(read) -> list:
+def load_file(read) -> iter:
     """
     Accept read (file to be read).
-    Return as a list of stripped non-empty lines.
+    Yield its stripped non-empty lines, reading lazily.
     """
     logging.info("reading %s", read)
     with open(read, "r", encoding="utf8") as source:
-        return [line.strip() for line in source if line.strip()]
+        for line in source:
+            if line := line.strip():
+                yield line
+
+
+def flush_results(results: dict, dest):
+    """
+    Accept results (dict of csv name to list of rows), dest.
+    Write each list of rows to its csv in dest, then empty results.
+    """
+    for key, rows in results.items():
+        write_csv(f"{key}.csv", rows, dest=dest)
+    results.clear()
+
+
+async def scrape_accounts(
+    accounts: iter,
+    dest,
+    jobs=8,
+    flush_every=50,
+    page_timeout=30,
+    headless=True,
+    cdp_endpoint=None,
+):
+    """
+    Accept accounts (iter), dest (directory for csvs),
+    optional jobs (default 8), flush_every (default 50),
+    page_timeout (seconds, default 30), headless (default True),
+    cdp_endpoint.
+    Scrape accounts with one browser and one context per worker,
+    at most jobs at a time, and write the results to csvs in dest
+    every flush_every accounts.
+    """
+    accounts = iter(accounts)
+    results = {}
+    n_buffered = 0
+    async with async_playwright() as playwright:
+        browser = await get_browser(playwright, headless, cdp_endpoint)
+
+        async def worker():
+            nonlocal n_buffered
+            # Workers share the accounts iterator, so no more than jobs
+            # accounts are in flight and accounts are read lazily.
+            # Each worker keeps one context; run closes its own page.
+            context = await browser.new_context()
+            # A timed out step raises, and run's retry starts it over.
+            context.set_default_timeout(page_timeout * 1000)
+            await context.route("**/*", block_resources)
+            try:
+                for account in accounts:
+                    try:
+                        result = await run(context, account)
+                    except Exception as error:
+                        # Without a browser every account would fail,
+                        # each only after all of its retries; stop.
+                        if not browser.is_connected():
+                            logging.error(
+                                "%s: browser disconnected: %s", account, error
+                            )
+                            raise
+                        # run's retries are spent; skip the account
+                        # rather than abort the other workers.
+                        logging.error("%s: giving up: %s", account, error)
+                        continue
+                    if not result:
+                        continue
+                    for key, value in result.items():
+                        # Empty dicts (eg no residential building)
+                        # would blank the header of a batched csv.
+                        results.setdefault(key, []).extend(
+                            row for row in value if row
+                        )
+                    if (n_buffered := n_buffered + 1) >= flush_every:
+                        flush_results(results, dest)
+                        n_buffered = 0
+            finally:
+                await context.close()
+
+        try:
+            await asyncio.gather(*[worker() for _ in range(jobs)])
+        finally:
+            flush_results(results, dest)
 
 
 def custom_parser() -> argparse.ArgumentParser:
@@ -658,6 +861,30 @@ def custom_parser() -> argparse.ArgumentParser:
                 "default": ".",
             },
         },
+        {
+            "args": ["-j", "--jobs"],
+            "kwargs": {
+                "help": "Number of accounts to scrape concurrently.",
+                "type": positive_int,
+                "default": 8,
+            },
+        },
+        {
+            "args": ["-t", "--page-timeout"],
+            "kwargs": {
+                "help": "Seconds to wait for each page action.",
+                "type": float,
+                "default": 30,
+            },
+        },
+        {
+            "args": ["-F", "--flush-every"],
+            "kwargs": {
+                "help": "Write results to the csvs every this many accounts.",
+                "type": int,
+                "default": 50,
+            },
+        },
     ]
     return get_parser(*arguments, log=log)
 
@@ -680,20 +907,27 @@ def main():
     if not (accounts or read_file):
         parser.error("we need a read-file or at least one account")
 
-    if not accounts:
-        accounts = []
     if read_file:
-        accounts += load_file(read_file)
+        accounts = chain(accounts or [], load_file(read_file))
+    # Each duplicate would cost a full scrape; keep the first of each.
+    accounts = unique(accounts)
 
-    for account in accounts:
-        if args.dry_run:
+    if args.dry_run:
+        for account in accounts:
             print(account)
-        else:
-            with sync_playwright() as playwright:
-                result = run(playwright, account, headless=headless)
-                if result:
-                    for key, value in result.items():
-                        write_csv(f"{key}.csv", value, dest=dest)
+        return
+
+    asyncio.run(
+        scrape_accounts(
+            accounts,
+            dest,
+            jobs=args.jobs,
+            flush_every=args.flush_every,
+            page_timeout=args.page_timeout,
+            headless=headless,
+            cdp_endpoint=args.cdp_endpoint,
+        )
+    )
 
 
 if __name__ == "__main__":
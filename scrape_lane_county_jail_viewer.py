@@ -4,22 +4,27 @@ Scrape information from
 http://inmateinformation.lanecounty.org
 """
 
+import asyncio
 from collections import namedtuple
 from itertools import chain
 import re
 
-from playwright.sync_api import (
+from playwright.async_api import (
     Playwright,
-    sync_playwright,
+    async_playwright,
 )
 
 from lcapps import (
     argparse,
+    block_resources,
     configure_logging,
+    get_browser,
     get_parser,
     log_name,
     logging,
+    positive_int,
     retry,
+    strip,
     write_csv,
 )
 
@@ -32,231 +37,314 @@ Filter = namedtuple(
     ["last_name", "first_name", "booking_begin_date", "booking_end_date"],
 )
 EMPTY_FILTER = Filter("%", "%", None, None)
+# booking_begin_date -> Booking Begin Date
+FILTER_LABELS = {
+    field: " ".join([word.capitalize() for word in field.split("_")])
+    for field in Filter._fields
+}
+# "Case #:" but not "Court Case #:"
+CASE_RE = re.compile(r"^\s*Case #:")
 
 
-def extract_field(
-    locator, prefix: str, role="cell", index=None, regex=None
-) -> str:
+def extract_field(texts: list, prefix: str, index=None, regex=None) -> str:
     """
-    Accept a Playwright locator,
+    Accept texts (list of element texts, eg from all_text_contents()),
     a prefix to strip (and by default to search for),
-    optional role (default "cell"),
     optional index,
     optional regex (use instead of prefix to search).
+    Like Playwright's get_by_role name matching, the prefix search is
+    case-insensitive and ignores extra whitespace.
     Return the stripped text after the search, at index (or last)
     """
     if regex is None:
-        search = prefix
+        search = strip(prefix).lower()
+        matches = [text for text in texts if search in strip(text).lower()]
     else:
-        search = regex
-    located = locator.get_by_role(role, name=search)
+        matches = [text for text in texts if regex.search(strip(text))]
     if index is None:
-        cell = located.last
+        text = matches[-1]
     else:
-        cell = located.nth(index)
-    return cell.text_content().strip().removeprefix(prefix).strip()
+        text = matches[index]
+    return text.strip().removeprefix(prefix).strip()
 
 
-def get_charge(tbody, inmate_id, booking_number, index) -> dict:
+def split_charges(cells: list) -> list:
     """
-    Accept tbody (charges table body from BookingSearchDetail),
-    inmate_id, booking_number,
-    index (which charge to scrape)
+    Accept cells (cell texts of the charges table body
+    from BookingSearchDetail).
+    Return a list of lists of cell texts, one per charge,
+    each starting at its "Violation:" cell.
+    """
+    charges = []
+    for cell in cells:
+        if "Violation:" in cell:
+            charges.append([])
+        if charges:
+            charges[-1].append(cell)
+    return charges
+
+
+def get_charge(cells: list, inmate_id, booking_number) -> dict:
+    """
+    Accept cells (cell texts of one charge, from split_charges),
+    inmate_id, booking_number.
     Return a dict of the charge.
     """
     return {
         "booking_number": booking_number,
         "inmate_id": inmate_id,
-        "violation": extract_field(tbody, "Violation:", index=index),
-        "level": extract_field(tbody, "Level:", index=index),
-        "additional_description": extract_field(
-            tbody, "Add. Desc.:", index=index
-        ),
-        "OBTS_number": extract_field(tbody, "OBTS #:", index=index),
-        "warrant_number:": extract_field(tbody, "War.#:", index=index),
-        "end_of_sentence_date": extract_field(
-            tbody, "End Of Sentence Date:", index=index
-        ),
-        "clearance": extract_field(tbody, "Clearance:", index=index),
-        "arrest_agency": extract_field(tbody, "Arrest Agency:", index=index),
-        "case_number": extract_field(
-            tbody,
-            "Case #:",
-            regex=re.compile(r"^\s*Case #:"),
-            index=index,
-        ),
-        "arrest_date": extract_field(tbody, "Arrest Date:", index=index),
-        "court_type": extract_field(tbody, "Court Type:", index=index),
-        "court_case_number": extract_field(
-            tbody, "Court Case #:", index=index
-        ),
-        "next_court_date": extract_field(
-            tbody, "Next Court Date", index=index
-        ),
-        "required_bond_bail": extract_field(
-            tbody, "Req. Bond/Bail:", index=index
-        ),
-        "bond_group_number": extract_field(
-            tbody, "Bond Group #:", index=index
-        ),
-        "required_bond_amount": extract_field(
-            tbody, "Req. Bond Amt:", index=index
-        ),
-        "required_cash_amount": extract_field(
-            tbody, "Req. Cash Amt:", index=index
-        ),
-        "bond_company_number": extract_field(
-            tbody, "Bond Co. #:", index=index
-        ),
+        "violation": extract_field(cells, "Violation:"),
+        "level": extract_field(cells, "Level:"),
+        "additional_description": extract_field(cells, "Add. Desc.:"),
+        "OBTS_number": extract_field(cells, "OBTS #:"),
+        "warrant_number:": extract_field(cells, "War.#:"),
+        "end_of_sentence_date": extract_field(cells, "End Of Sentence Date:"),
+        "clearance": extract_field(cells, "Clearance:"),
+        "arrest_agency": extract_field(cells, "Arrest Agency:"),
+        "case_number": extract_field(cells, "Case #:", regex=CASE_RE),
+        "arrest_date": extract_field(cells, "Arrest Date:"),
+        "court_type": extract_field(cells, "Court Type:"),
+        "court_case_number": extract_field(cells, "Court Case #:"),
+        "next_court_date": extract_field(cells, "Next Court Date"),
+        "required_bond_bail": extract_field(cells, "Req. Bond/Bail:"),
+        "bond_group_number": extract_field(cells, "Bond Group #:"),
+        "required_bond_amount": extract_field(cells, "Req. Bond Amt:"),
+        "required_cash_amount": extract_field(cells, "Req. Cash Amt:"),
+        "bond_company_number": extract_field(cells, "Bond Co. #:"),
     }
 
 
-def get_charges(page, inmate_id: str, booking_number: str) -> list:
+async def get_charges(page, inmate_id: str, booking_number: str) -> list:
     """
     Accept page (BookingSearchDetail),
     Return a list of dicts (charges)
     """
     tbody = page.locator("tbody").filter(has_text="Violation: ").first
-    charges = tbody.get_by_role("cell", name="Violation:").all()
+    cells = await tbody.get_by_role("cell").all_text_contents()
+    charges = split_charges(cells)
     logging.debug("found %d charges", len(charges))
     return [
-        get_charge(tbody, inmate_id, booking_number, index)
-        for index in range(len(charges))
+        get_charge(charge_cells, inmate_id, booking_number)
+        for charge_cells in charges
     ]
 
 
 @retry()
-def get_booking(row, context) -> dict:
+async def get_booking(row_cells: list, pages: asyncio.Queue) -> dict:
     """
-    Accept row from inmateinformation.lanecounty.org/Home/BookingSearchResult?
+    Accept row_cells (cell texts of a row from
+    inmateinformation.lanecounty.org/Home/BookingSearchResult?)
+    and pages (pool of detail pages, see new_page_pool).
     Return a dict of information about the booking.
     """
-    booking_id = row.get_by_role("cell").nth(1).text_content().strip()
-    first_name = row.get_by_role("cell").nth(2).text_content().strip()
-    last_name = row.get_by_role("cell").nth(3).text_content().strip()
-    middle_name = row.get_by_role("cell").nth(4).text_content().strip()
-    page = context.new_page()
-    url = f"{SEARCH_DETAIL}?BookingNumber={booking_id}"
-    page.goto(url)
-    page.wait_for_url(url)
-    page.wait_for_load_state()
-    logging.debug("get_booking on %s", page.url)
-
-    booking_number = extract_field(page, "Booking Number:")
-    assert booking_id == booking_number
-    inmate_id = extract_field(page, "Inmate ID:")
-    n_charges = int(extract_field(page, "Charges:", role="heading"))
-    charges = get_charges(page, inmate_id, booking_number)
-    found_charges = len(charges)
+    booking_id, first_name, last_name, middle_name = [
+        cell.strip() for cell in row_cells[1:5]
+    ]
+    page = await pages.get()
     try:
-        assert n_charges == found_charges
-    except AssertionError:
-        logging.error(
-            "booking ID: %s expected %d charges, got %d",
-            booking_id,
-            n_charges,
-            found_charges,
-        )
-        raise
-    logging.info("booking ID: %s has %d charges", booking_id, n_charges)
-
-    results = {
-        "booking_number": booking_number,
-        "inmate_id": inmate_id,
-        "first_name": first_name,
-        "last_name": last_name,
-        "middle_name": middle_name,
-        "n_charges": n_charges,
-        "booking_date": extract_field(page, "Booking Date:"),
-        "scheduled_release": extract_field(page, "Sched. Release:"),
-        "released": extract_field(page, "Released:"),
-        "age": extract_field(page, "Age:"),
-        "sex": extract_field(page, "Sex:"),
-        "race": extract_field(page, "Race:"),
-        "hair": extract_field(page, "Hair:"),
-        "eyes": extract_field(page, "Eyes:"),
-        "height": extract_field(page, "Height:"),
-        "weight": extract_field(page, "Weight:"),
-        "in_custody_as_of": extract_field(
-            page, "IN CUSTODY as of", role="link"
-        ),
-        "charges": charges,
-    }
-    page.close()
-    return results
+        url = f"{SEARCH_DETAIL}?BookingNumber={booking_id}"
+        # The detail page is server rendered; no need to wait for "load".
+        await page.goto(url, wait_until="domcontentloaded")
+        logging.debug("get_booking on %s", page.url)
+
+        # Read each role's texts once and search them in Python,
+        # rather than one locator round-trip per field.
+        cells = await page.get_by_role("cell").all_text_contents()
+        headings = await page.get_by_role("heading").all_text_contents()
+        links = await page.get_by_role("link").all_text_contents()
+
+        booking_number = extract_field(cells, "Booking Number:")
+        assert booking_id == booking_number
+        inmate_id = extract_field(cells, "Inmate ID:")
+        n_charges = int(extract_field(headings, "Charges:"))
+        charges = await get_charges(page, inmate_id, booking_number)
+        found_charges = len(charges)
+        try:
+            assert n_charges == found_charges
+        except AssertionError:
+            logging.error(
+                "booking ID: %s expected %d charges, got %d",
+                booking_id,
+                n_charges,
+                found_charges,
+            )
+            raise
+        logging.info("booking ID: %s has %d charges", booking_id, n_charges)
+
+        results = {
+            "booking_number": booking_number,
+            "inmate_id": inmate_id,
+            "first_name": first_name,
+            "last_name": last_name,
+            "middle_name": middle_name,
+            "n_charges": n_charges,
+            "booking_date": extract_field(cells, "Booking Date:"),
+            "scheduled_release": extract_field(cells, "Sched. Release:"),
+            "released": extract_field(cells, "Released:"),
+            "age": extract_field(cells, "Age:"),
+            "sex": extract_field(cells, "Sex:"),
+            "race": extract_field(cells, "Race:"),
+            "hair": extract_field(cells, "Hair:"),
+            "eyes": extract_field(cells, "Eyes:"),
+            "height": extract_field(cells, "Height:"),
+            "weight": extract_field(cells, "Weight:"),
+            "in_custody_as_of": extract_field(links, "IN CUSTODY as of"),
+            "charges": charges,
+        }
+        return results
+    finally:
+        pages.put_nowait(page)
+
+
+async def new_page_pool(context, size: int) -> asyncio.Queue:
+    """
+    Accept context, size.
+    Return a queue of size pages of context.
+    Taking a page from the queue, and putting it back when done,
+    both reuses pages and limits concurrency to size.
+    """
+    pages = asyncio.Queue()
+    for _ in range(size):
+        pages.put_nowait(await context.new_page())
+    return pages
 
 
-def get_page(page, context) -> list:
+async def get_row_cells(page) -> list:
     """
-    Accept page (BookingSearchResult)
-    and context.
-    Return a list of the bookings on that page.
+    Accept page (BookingSearchResult).
+    Return a list of the cell texts of each booking row on that page.
     """
-    page.wait_for_load_state()
-    logging.debug("get_page on %s", page.url)
+    await page.wait_for_load_state("domcontentloaded")
+    logging.debug("get_row_cells on %s", page.url)
     tbody = page.locator("tbody").first
-    rows = tbody.get_by_role("row").all()
-    return [get_booking(row, context) for row in rows]
+    return [
+        await row.get_by_role("cell").all_text_contents()
+        for row in await tbody.get_by_role("row").all()
+    ]
 
 
-def get_paginated(page, context) -> list:
+async def produce_rows(
+    page, rows: asyncio.Queue, consumers: int, paginate=False
+):
+    """
+    Accept page (BookingSearchResult), rows (queue to fill),
+    consumers (number of consume_rows tasks),
+    optional paginate (follow ">" links, default False).
+    Put (listing index, cell texts) of each booking row in rows,
+    then one None per consumer to tell it to stop.
+    """
+    next_link = page.get_by_role("link", name=">", exact=True)
+    index = 0
+    try:
+        while True:
+            for row_cells in await get_row_cells(page):
+                await rows.put((index, row_cells))
+                index += 1
+            if not paginate or not await next_link.count():
+                break
+            await next_link.click()
+    finally:
+        for _ in range(consumers):
+            await rows.put(None)
+
+
+async def consume_rows(rows: asyncio.Queue, pages: asyncio.Queue) -> list:
     """
-    Accept page (BookingSearchResult)
-    and context.
-    Return a list of the bookings on that page
-    and all of its paginated successors.
+    Accept rows (queue filled by produce_rows)
+    and pages (pool of detail pages).
+    Return a list of (listing index, booking) of rows taken until a None.
     """
-    results = get_page(page, context)
-
-    while True:
-        table_pager = page.locator("tfoot")
-        if ">" in table_pager.text_content():
-            page.get_by_role("link", name=">", exact=True).click()
-            results += get_page(page, context)
-        else:
-            break
+    results = []
+    while (row := await rows.get()) is not None:
+        index, row_cells = row
+        results.append((index, await get_booking(row_cells, pages)))
     return results
 
 
-def fill_from_filters(page, filters: Filter):
+async def get_bookings(
+    page, pages: asyncio.Queue, jobs: int, paginate=False
+) -> list:
+    """
+    Accept page (BookingSearchResult),
+    pages (pool of detail pages),
+    jobs (number of bookings to scrape at a time),
+    optional paginate (also scrape paginated successors, default False).
+    Return a list of the bookings, in listing order.
+    The listing is paged through while earlier rows are still being
+    scraped, rather than finishing each listing page first.
+    """
+    rows = asyncio.Queue()
+    _, *consumed = await asyncio.gather(
+        produce_rows(page, rows, jobs, paginate),
+        *[consume_rows(rows, pages) for _ in range(jobs)],
+    )
+    indexed = sorted(chain.from_iterable(consumed), key=lambda pair: pair[0])
+    return [booking for _, booking in indexed]
+
+
+async def fill_from_filters(page, filters: Filter):
     """
     Accept page (BookingSearchQuery)
     and filters.
     Fill fields in the page based on filters.
     """
-    for field in filters._fields:
-        # booking_begin_date -> Booking Begin Date
-        label = " ".join([word.capitalize() for word in field.split("_")])
+    for field, label in FILTER_LABELS.items():
         value = getattr(filters, field)
         if value is not None:
-            page.get_by_label(label).fill(value)
+            await page.get_by_label(label).fill(value)
 
 
-def run(playwright: Playwright, headless=True, filters=EMPTY_FILTER) -> list:
+async def run(
+    playwright: Playwright,
+    headless=True,
+    filters=EMPTY_FILTER,
+    cdp_endpoint=None,
+    jobs=5,
+) -> list:
     """
-    Run playwright against http://inmateinformation.lanecounty.org/.
+    Run playwright against http://inmateinformation.lanecounty.org/,
+    scraping at most jobs (default 5) bookings at a time.
     Return a list of dicts of inmate bookings.
     """
-    browser = playwright.chromium.launch(headless=headless)
-    context = browser.new_context()
-    page = context.new_page()
-    page.goto(f"{INMATE_INFORMATION}/")
-    page.get_by_role("link", name="Access Site").click()
-    fill_from_filters(page, filters)
-    page.get_by_role("button", name="Search").click()
-    page.wait_for_url(f"{SEARCH_RESULT}**")
-    page.wait_for_load_state()
-    n_candidates = int(
-        extract_field(page, "Total Candidates:", role="heading")
-    )
-    logging.info("expect %d candidates", n_candidates)
-    if n_candidates > 15:
-        results = get_paginated(page, context)
-    else:
-        results = get_page(page, context)
-    if n_candidates != len(results):
-        logging.error("expected %d, got %d", n_candidates, len(results))
-    return results
+    browser = await get_browser(playwright, headless, cdp_endpoint)
+    context = await browser.new_context()
+    await context.route("**/*", block_resources)
+    try:
+        pages = await new_page_pool(context, jobs)
+        page = await context.new_page()
+        await page.goto(f"{INMATE_INFORMATION}/")
+        await page.get_by_role("link", name="Access Site").click()
+        await fill_from_filters(page, filters)
+        await page.get_by_role("button", name="Search").click()
+        await page.wait_for_url(
+            f"{SEARCH_RESULT}**", wait_until="domcontentloaded"
+        )
+        n_candidates = int(
+            extract_field(
+                await page.get_by_role("heading").all_text_contents(),
+                "Total Candidates:",
+            )
+        )
+        logging.info("expect %d candidates", n_candidates)
+        results = await get_bookings(
+            page, pages, jobs, paginate=n_candidates > 15
+        )
+        if n_candidates != len(results):
+            logging.error("expected %d, got %d", n_candidates, len(results))
+        return results
+    finally:
+        # This closes the page pool and the listing page as well;
+        # with --cdp-endpoint the browser outlives this run.
+        await context.close()
+
+
+async def scrape(**kwargs) -> list:
+    """
+    Accept kwargs for run.
+    Start playwright and return the results of run.
+    """
+    async with async_playwright() as playwright:
+        return await run(playwright, **kwargs)
 
 
 def custom_parser() -> argparse.ArgumentParser:
@@ -293,6 +381,14 @@ def custom_parser() -> argparse.ArgumentParser:
                 "default": None,
             },
         },
+        {
+            "args": ["-j", "--jobs"],
+            "kwargs": {
+                "help": "Number of bookings to scrape concurrently.",
+                "type": positive_int,
+                "default": 5,
+            },
+        },
     ]
     return get_parser(*arguments, log=log)
 
@@ -316,31 +412,37 @@ def main():
 
     configure_logging(args.log, args.log_level)
     headless = not args.no_headless
-    with sync_playwright() as playwright:
-        results = run(playwright, headless=headless, filters=filters)
-
-        bookings = [
-            {
-                k: v
-                for k, v in result.items()
-                if k not in ["charges", "in_custody_as_of"]
-            }
-            for result in results
-        ]
-        write_csv("bookings.csv", bookings)
-
-        custody = [
-            {
-                k: v
-                for k, v in result.items()
-                if k in ["booking_number", "inmate_id", "in_custody_as_of"]
-            }
-            for result in results
-        ]
-        write_csv("custody.csv", custody)
-
-        charges = list(chain.from_iterable([el["charges"] for el in results]))
-        write_csv("charges.csv", charges)
+    results = asyncio.run(
+        scrape(
+            headless=headless,
+            filters=filters,
+            cdp_endpoint=args.cdp_endpoint,
+            jobs=args.jobs,
+        )
+    )
+
+    bookings = [
+        {
+            k: v
+            for k, v in result.items()
+            if k not in ["charges", "in_custody_as_of"]
+        }
+        for result in results
+    ]
+    write_csv("bookings.csv", bookings)
+
+    custody = [
+        {
+            k: v
+            for k, v in result.items()
+            if k in ["booking_number", "inmate_id", "in_custody_as_of"]
+        }
+        for result in results
+    ]
+    write_csv("custody.csv", custody)
+
+    charges = list(chain.from_iterable([el["charges"] for el in results]))
+    write_csv("charges.csv", charges)
 
 
 if __name__ == "__main__":
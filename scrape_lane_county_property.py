@@ -5,31 +5,62 @@ https://apps.lanecounty.org/PropertyAccountInformation/
 """
 
 import argparse
-from itertools import chain
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import random
 import re
-from time import sleep
+import sys
 
-from playwright.sync_api import Playwright, sync_playwright
+from playwright.async_api import (
+    async_playwright,
+    TimeoutError as PlaywrightTimeoutError,
+)
 
 from lcapps import (
+    block_resources,
     configure_logging,
+    get_browser,
     get_parser,
     logging,
     log_name,
+    positive_int,
     strip,
-    write_csv,
+    unique,
 )
 
 import sections
 
+# Kendo UI grids cover themselves with this while their data loads.
+LOADING_MASK = ".k-loading-mask"
+# The part of a Kendo UI pager saying how many items were found.
+PAGER_INFO = ".k-pager-info"
+# A section's 16ths are its number followed by these two digits.
+SIXTEENTH_OFFSETS = tuple(m * 10 + n for m in range(1, 5) for n in range(1, 5))
+# Endings of the pager's items found text.
+NO_ITEMS = "No items to display"
+OF_100 = "of 100 items"
+ITEMS_RE = re.compile(" of ([1-9][0-9]*) items")
+# Times a prefix is searched before a timeout makes us give up on it.
+SEARCH_TRIES = 2
+# Every row's cell texts, read in one round trip (see scrape).
+ROW_CELLS_JS = """
+(trs) =>
+    trs.map((tr) =>
+        Array.from(tr.querySelectorAll("td"), (td) => td.textContent)
+    )
+"""
+
 
-def get_16ths_of_multiple_sections(section_list: iter) -> list:
+def get_16ths_of_multiple_sections(section_list: iter) -> iter:
     """
     Accept an iterable of 6 digit land sections.
-    Return all of their 16th sections in one list.
+    Return a generator of all of their 16th sections.
     """
-    return chain.from_iterable(
-        [get_16ths(section) for section in section_list]
+    return (
+        section * 100 + offset
+        for section in section_list
+        for offset in SIXTEENTH_OFFSETS
     )
 
 
@@ -38,67 +69,94 @@ def get_16ths(section: int) -> list:
     Accept a 6 digit land section.
     Return its 16th sections.
     """
-    return [
-        section * 100 + m * 10 + n for m in range(1, 5) for n in range(1, 5)
-    ]
+    return [section * 100 + offset for offset in SIXTEENTH_OFFSETS]
 
 
-def parse_row(row) -> dict:
+def parse_row(cells: list) -> dict:
     """
-    Accept a locator("tr") object.
+    Accept cells (cell texts of a results row).
     Return a dict of Lane County property look-up fields.
     """
-    cells = row.locator("td")
     return {
-        "account": strip(cells.nth(1).text_content()),
-        "map_and_tax_lot": strip(cells.nth(2).text_content()),
-        "tax_payer": strip(cells.nth(3).text_content()),
-        "owner": strip(cells.nth(4).text_content()),
-        "situs_address": strip(cells.nth(5).text_content()),
+        "account": strip(cells[1]),
+        "map_and_tax_lot": strip(cells[2]),
+        "tax_payer": strip(cells[3]),
+        "owner": strip(cells[4]),
+        "situs_address": strip(cells[5]),
     }
 
 
-def scrape(page) -> list:
+async def scrape(page) -> list:
     """
     Accept a playwright page.
     Return a list of dicts of property info.
     """
-    rows = page.locator("tbody").locator("tr").all()
-    return [parse_row(row) for row in rows]
+    rows = await page.locator("tbody").locator("tr").evaluate_all(
+        ROW_CELLS_JS
+    )
+    return [parse_row(cells) for cells in rows]
+
+
+def is_search_response(response, prefix: int) -> bool:
+    """
+    Accept response, prefix.
+    Return whether it answers an XHR or fetch request for prefix,
+    ie one with prefix in its URL or its post data.
+    """
+    request = response.request
+    if request.resource_type not in ("xhr", "fetch"):
+        return False
+    return str(prefix) in f"{request.url} {request.post_data or ''}"
+
+
+async def wait_for_grid(page):
+    """
+    Accept page.
+    Wait until its results grid has finished loading.
+    """
+    await page.locator(LOADING_MASK).first.wait_for(state="hidden")
 
 
-def search(page, prefix: int) -> list:
+async def search(page, prefix: int):
     """
     Search the lane county property page for prefix.
-    Return a list of dicts.
-    """
-    logging.info("%d", prefix)
-    page.get_by_placeholder("Enter partial map and taxlot").fill(str(prefix))
-    page.get_by_role("button", name="Save Search").click()
-    sleep(4)
-    page.get_by_label("select").locator("span").click()
-    page.get_by_role("option", name="All").click()
-    pager = page.locator("div").filter(
-        has=page.get_by_label("Go to the last page")
+    Return a list of dicts,
+    or None if there are too many to list and prefix must be refined.
+    """
+    logging.debug("%d: searching", prefix)
+    await page.get_by_placeholder("Enter partial map and taxlot").fill(
+        str(prefix)
     )
-    items_found = pager.locator("span").last.text_content()
-    if items_found.endswith("No items to display"):
-        logging.info("%d: No items found.", prefix)
+    # The search's data arrives by XHR; waiting for all of it means
+    # the grid's loading mask cannot be checked before it is shown,
+    # and the pager no longer holds the previous prefix's count.
+    # Other XHRs (eg analytics) do not carry the prefix.
+    async with page.expect_response(
+        lambda response: is_search_response(response, prefix)
+    ) as response_info:
+        await page.get_by_role("button", name="Save Search").click()
+    await (await response_info.value).finished()
+    await wait_for_grid(page)
+    # The pager counts every item, whatever the page size,
+    # so only show "All" when the items are to be scraped.
+    items_found = await page.locator(PAGER_INFO).first.text_content()
+    if items_found.endswith(NO_ITEMS):
+        logging.debug("%d: No items found.", prefix)
         return []
-    if items_found.endswith("of 100 items"):
-        logging.info(
-            "%d: 100 or more items found. Calling recursively.", prefix
-        )
-        return list(
-            chain.from_iterable(
-                [search(page, prefix * 10 + n) for n in range(10)]
-            )
-        )
-    m = re.search(" of ([1-9][0-9]*) items", items_found)
+    if items_found.endswith(OF_100):
+        logging.debug("%d: 100 or more items found. Refining.", prefix)
+        return None
+    m = ITEMS_RE.search(items_found)
     if m:
         found = int(m.groups()[0])
-        logging.info("%d: %d items found", prefix, found)
-        scraped = scrape(page)
+        logging.debug("%d: %d items found", prefix, found)
+        await page.get_by_label("select").locator("span").click()
+        await page.get_by_role("option", name="All").click()
+        await wait_for_grid(page)
+        # Showing "All" may render the rows after the mask is gone.
+        rows = page.locator("tbody").locator("tr")
+        await rows.nth(found - 1).wait_for(state="attached")
+        scraped = await scrape(page)
         n_scraped = len(scraped)
         if n_scraped != found:
             message = (
@@ -112,18 +170,184 @@ def search(page, prefix: int) -> list:
     raise ValueError(message)
 
 
-def run(playwright: Playwright, prefix: int, headless=True) -> list:
+async def enable_http_cache(context, page):
+    """
+    Accept context, page (of context).
+    Turn the HTTP cache back on for page.
+    Playwright turns it off for pages of a context with routes,
+    but every search loads the same scripts.
+    """
+    cdp = await context.new_cdp_session(page)
+    await cdp.send("Network.setCacheDisabled", {"cacheDisabled": False})
+
+
+async def open_search_page(context):
+    """
+    Accept context.
+    Return a new page of context, ready to search by map and taxlot.
+    The page can be reused for any number of searches.
+    """
+    page = await context.new_page()
+    await enable_http_cache(context, page)
+    await page.goto("https://apps.lanecounty.org/PropertyAccountInformation/#")
+    await page.get_by_role("button", name="Search by Account Number").click()
+    await page.get_by_role("menuitem", name="Search by Map and Taxlot").click()
+    return page
+
+
+def append_writer(csvfile, fieldnames) -> csv.DictWriter:
     """
-    Run playwrite
+    Accept csvfile (opened for append), fieldnames.
+    Return a DictWriter for csvfile,
+    having written the header if csvfile was empty.
     """
-    browser = playwright.chromium.launch(headless=headless)
-    context = browser.new_context()
-    context.set_default_timeout(100_000)
-    page = context.new_page()
-    page.goto("https://apps.lanecounty.org/PropertyAccountInformation/#")
-    page.get_by_role("button", name="Search by Account Number").click()
-    page.get_by_role("menuitem", name="Search by Map and Taxlot").click()
-    return search(page, prefix)
+    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    if csvfile.tell() == 0:
+        writer.writeheader()
+    return writer
+
+
+async def scrape_sections(
+    section_list: iter,
+    output,
+    jobs=8,
+    flush_every=50,
+    headless=True,
+    cdp_endpoint=None,
+):
+    """
+    Accept section_list (iter of 6 digit land sections), output,
+    optional jobs (default 8), flush_every (default 50),
+    headless (default True), cdp_endpoint.
+    Scrape the sections with one browser and one page per worker,
+    at most jobs prefixes at a time, appending the results to output
+    every flush_every prefixes with results.
+    A prefix with too many results to list is replaced, breadth first,
+    by its ten one digit longer prefixes.
+    Log each section's total once its last prefix is done.
+    Return a sorted list of the prefixes given up on after timeouts.
+    """
+    # (section, prefix) pairs, so a prefix's results count to its section.
+    prefixes = asyncio.Queue()
+    # Items found, and prefixes queued or in flight, per section.
+    found = {}
+    outstanding = {}
+    timeouts = {}
+    failed = []
+    for section in section_list:
+        prefixes.put_nowait((section, section))
+        found[section] = 0
+        outstanding[section] = outstanding.get(section, 0) + 1
+
+    def finish_prefix(section):
+        outstanding[section] -= 1
+        if not outstanding[section]:
+            logging.info(
+                "%d SECTION: %d total items found", section, found[section]
+            )
+
+    loop = asyncio.get_running_loop()
+    writer = None
+    buffered = []
+    n_buffered = 0
+    # Keep output open for the whole run rather than reopening it
+    # for every prefix's results, and write to it from one thread,
+    # so writes keep their order and never block the event loop.
+    with (
+        open(output, "a", encoding="utf8") as csvfile,
+        ThreadPoolExecutor(max_workers=1) as writes,
+    ):
+
+        async def flush():
+            nonlocal writer, n_buffered
+            if not buffered:
+                return
+            # Take the rows before awaiting, so other workers
+            # can keep buffering while these are written.
+            rows = buffered.copy()
+            buffered.clear()
+            n_buffered = 0
+            if writer is None:
+                writer = append_writer(csvfile, rows[0].keys())
+            await loop.run_in_executor(writes, writer.writerows, rows)
+
+        async with async_playwright() as playwright:
+            browser = await get_browser(playwright, headless, cdp_endpoint)
+
+            async def worker():
+                nonlocal n_buffered
+                context = await browser.new_context()
+                # Let a stuck action fail fast; page loads get longer.
+                context.set_default_navigation_timeout(100_000)
+                context.set_default_timeout(10_000)
+                await context.route("**/*", block_resources)
+                try:
+                    # Load the page once; each search only refills it.
+                    page = await open_search_page(context)
+                    while True:
+                        section, prefix = await prefixes.get()
+                        try:
+                            results = await search(page, prefix)
+                        except PlaywrightTimeoutError:
+                            # The page may be stuck mid-search.
+                            await page.close()
+                            page = await open_search_page(context)
+                            timeouts[prefix] = timeouts.get(prefix, 0) + 1
+                            if timeouts[prefix] < SEARCH_TRIES:
+                                logging.warning(
+                                    "%d: timed out; retrying", prefix
+                                )
+                                prefixes.put_nowait((section, prefix))
+                            else:
+                                logging.error(
+                                    "%d: timed out; skipping", prefix
+                                )
+                                failed.append(prefix)
+                                finish_prefix(section)
+                        else:
+                            if results is None:
+                                outstanding[section] += 10
+                                for n in range(10):
+                                    prefixes.put_nowait(
+                                        (section, prefix * 10 + n)
+                                    )
+                            elif results:
+                                found[section] += len(results)
+                                buffered.extend(results)
+                                n_buffered += 1
+                                if n_buffered >= flush_every:
+                                    await flush()
+                            finish_prefix(section)
+                        finally:
+                            prefixes.task_done()
+                finally:
+                    await context.close()
+
+            workers = [asyncio.create_task(worker()) for _ in range(jobs)]
+            joined = asyncio.create_task(prefixes.join())
+            try:
+                # Workers only return by raising, so stop at the first
+                # error rather than waiting forever on the prefixes
+                # it left undone.
+                await asyncio.wait(
+                    [joined, *workers], return_when=asyncio.FIRST_COMPLETED
+                )
+                errors = [task.exception() for task in workers if task.done()]
+                for task in [joined, *workers]:
+                    task.cancel()
+                await asyncio.gather(joined, *workers, return_exceptions=True)
+            finally:
+                await flush()
+            if errors:
+                raise errors[0]
+    logging.info("%d total items found", sum(found.values()))
+    if failed:
+        logging.error(
+            "gave up on %d timed out prefixes: %s",
+            len(failed),
+            " ".join(str(prefix) for prefix in sorted(failed)),
+        )
+    return sorted(failed)
 
 
 def custom_parser() -> argparse.ArgumentParser:
@@ -147,6 +371,22 @@ def custom_parser() -> argparse.ArgumentParser:
                 "default": "lane-county-property.csv",
             },
         },
+        {
+            "args": ["-F", "--flush-every"],
+            "kwargs": {
+                "help": "Write results to the csv every this many prefixes.",
+                "type": int,
+                "default": 50,
+            },
+        },
+        {
+            "args": ["-j", "--jobs"],
+            "kwargs": {
+                "help": "Number of sections to scrape concurrently.",
+                "type": positive_int,
+                "default": 8,
+            },
+        },
     ]
     return get_parser(*arguments, log=log)
 
@@ -160,19 +400,28 @@ def main():
 
     configure_logging(args.log, args.log_level)
 
-    for section in sections.cities[args.city]:
-        if args.dry_run:
+    # Each duplicate would cost a full search; keep the first of each.
+    section_list = list(unique(sections.cities[args.city]))
+    if args.dry_run:
+        for section in section_list:
             print(section)
-        else:
-            with sync_playwright() as playwright:
-                results = run(playwright, section)
-                if (number_of_results := len(results)) >= 1:
-                    write_csv(args.output, results)
-                logging.info(
-                    "%d SECTION: %d total items found",
-                    section,
-                    number_of_results,
-                )
+        return
+
+    # Neighbouring sections tend to be alike in size;
+    # shuffling spreads the big ones across the workers.
+    random.shuffle(section_list)
+    failed = asyncio.run(
+        scrape_sections(
+            section_list,
+            args.output,
+            jobs=args.jobs,
+            flush_every=args.flush_every,
+            headless=not args.no_headless,
+            cdp_endpoint=args.cdp_endpoint,
+        )
+    )
+    if failed:
+        sys.exit(f"{len(failed)} prefixes timed out; see {args.log}")
 
 
 if __name__ == "__main__":